@@ -5,75 +5,168 @@ Refactored version: uses sqlite3.Row for named column access, fixes indexing bug
 adds small input validation and friendlier prompts.
 """
 import sqlite3
-import random
-from typing import List, Optional
+import sys
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 
 
 class TodoApp:
+    # priority is stored as a small integer code; icons are only used for display
+    _CODE_BY_LABEL = {"hard": 1, "medium": 2, "easy": 3}
+    _ICON_BY_CODE = ("⚪", "🔴", "🟡", "🟢")  # index 0 = no priority
+    _PRINT_CHUNK_LINES = 500  # lines buffered by print_tasks per write()
+
     def __init__(self, db_path: str = "todo.db"):
-        # Use Row factory so we can access columns by name instead of numeric indexes
-        self.conn = sqlite3.connect(db_path)
+        # Use Row factory so we can access columns by name instead of numeric indexes.
+        # isolation_level=None: no implicit BEGIN before each DML; see transaction()
+        self.conn = sqlite3.connect(db_path, isolation_level=None, cached_statements=256)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
+        # WAL + synchronous=NORMAL: one fdatasync per commit instead of two full fsyncs
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+        self.cursor.execute("PRAGMA synchronous=NORMAL")
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+        self.cursor.execute("PRAGMA cache_size=-8000")  # ~8 MB page cache
+        self.cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
         self.create_table()
+        # Pre-built UPDATE statements (whitelisted columns only) so sqlite3's statement cache gets hits
+        allowed_columns = ("title", "description", "completed", "priority")
+        self._update_sql = {col: f"UPDATE tasks SET {col} = ? WHERE id = ?" for col in allowed_columns}
+        # Let SQLite gather planner statistics for tables that need them
+        self.conn.execute("PRAGMA optimize=0x10002")
 
     # ---------------- Core DB Methods ----------------
     def create_table(self) -> None:
-        """Create tasks table if it doesn't exist"""
+        """Create tasks table if it doesn't exist (migrating emoji priorities to integer codes)."""
+        with self.transaction():
+            legacy = self._has_text_priority()
+            if legacy:
+                # Column types can't be altered in place: rebuild the table
+                self.cursor.execute("ALTER TABLE tasks RENAME TO tasks_old")
+            self.cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    description TEXT,
+                    completed INTEGER DEFAULT 0,
+                    priority INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            if legacy:
+                self._copy_legacy_tasks()
+            # Indexes for the priority filter (search/statistics) and the completed filter (gamble/statistics)
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority)")
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed)")
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run the enclosed statements in one explicit transaction (rolled back on error).
+
+        Nested use joins the outer transaction instead of starting a new one.
+        """
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN")
+        try:
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            # SQLite may already have rolled back by itself (e.g. SQLITE_FULL, I/O errors)
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+
+    def _has_text_priority(self) -> bool:
+        """Return True if an existing tasks table still stores priority as emoji text."""
+        columns = {row["name"]: row["type"] for row in self.cursor.execute("PRAGMA table_info(tasks)")}
+        return "priority" in columns and columns["priority"].upper() != "INTEGER"
+
+    def _copy_legacy_tasks(self) -> None:
+        """Move rows from tasks_old into the new tasks table, mapping emoji to codes."""
         self.cursor.execute(
             """
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                completed INTEGER DEFAULT 0,
-                priority TEXT
-            )
+            INSERT INTO tasks (id, title, description, completed, priority)
+            SELECT id, title, description, completed,
+                   CASE priority WHEN '🔴' THEN 1 WHEN '🟡' THEN 2 WHEN '🟢' THEN 3 ELSE 0 END
+            FROM tasks_old
             """
         )
-        self.conn.commit()
+        # Keep the AUTOINCREMENT counter so ids of deleted tasks are never reused
+        self.cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+        self.cursor.execute("UPDATE sqlite_sequence SET name = 'tasks' WHERE name = 'tasks_old'")
+        self.cursor.execute("DROP TABLE tasks_old")
 
-    def get_all_tasks(self) -> List[sqlite3.Row]:
-        """Fetch all tasks from database (returns list of Row objects)"""
-        self.cursor.execute("SELECT * FROM tasks ORDER BY id")
+    def get_all_tasks(self) -> Iterator[sqlite3.Row]:
+        """Stream all tasks from database (Row objects, read lazily from the shared cursor).
+
+        Consume the result before running another query, or wrap it in list().
+        """
+        return self.cursor.execute("SELECT * FROM tasks ORDER BY id")
+
+    def get_task_summaries(self) -> List[sqlite3.Row]:
+        """Fetch all tasks without descriptions, for pick-a-task menus."""
+        self.cursor.execute("SELECT id, title, priority, completed FROM tasks ORDER BY id")
         return self.cursor.fetchall()
 
+    def get_random_incomplete_task(self) -> Optional[sqlite3.Row]:
+        """Let SQLite pick one incomplete task at random (None if there are none)."""
+        self.cursor.execute("SELECT id, title FROM tasks WHERE completed = 0 ORDER BY RANDOM() LIMIT 1")
+        return self.cursor.fetchone()
+
+    def has_tasks(self) -> bool:
+        """Return True if at least one task exists."""
+        self.cursor.execute("SELECT 1 FROM tasks LIMIT 1")
+        return self.cursor.fetchone() is not None
+
     def update_task_column(self, task_id: int, column: str, value) -> None:
         """Update a specific column for a task (whitelisted columns only)."""
-        allowed_columns = {"title", "description", "completed", "priority"}
-        if column not in allowed_columns:
+        sql = self._update_sql.get(column)
+        if sql is None:
             raise ValueError(f"Invalid column: {column}")
         # Use parameterized query to avoid injection
-        self.cursor.execute(f"UPDATE tasks SET {column} = ? WHERE id = ?", (value, task_id))
-        self.conn.commit()
+        self.cursor.execute(sql, (value, task_id))
 
     # ---------------- Utility Methods ----------------
-    def is_empty(self, tasks: List[sqlite3.Row]) -> bool:
-        """Return True and print message if tasks list is empty."""
+    def is_empty(self, tasks: Union[List[sqlite3.Row], int]) -> bool:
+        """Return True and print message if tasks list (or task count) is empty."""
         if not tasks:
             print("📋 No tasks yet!")
             return True
         return False
 
-    def print_tasks(self, tasks: List[sqlite3.Row]) -> None:
-        """Print tasks in a readable format (id, status, title, priority, description)."""
-        if self.is_empty(tasks):
-            return
+    def print_tasks(self, tasks: Iterable[sqlite3.Row]) -> int:
+        """Print tasks in a readable format (id, status, title, priority, description).
 
-        print("\n📋 Your Tasks:")
-        print("-" * 60)
+        Returns the number of tasks printed.
+        """
+        # tasks may be a one-shot iterator (see get_all_tasks), so it is only walked once.
+        # Lines are written in fixed-size chunks: few write() calls, bounded memory.
+        parts = ["\n📋 Your Tasks:", "-" * 60]
+        count = 0
         for task in tasks:
+            count += 1
             status = "✅" if task["completed"] else "⬜"
-            priority = task["priority"] or "⚪"
-            print(f"{status} [{task['id']}] {task['title']} {priority}")
+            priority = TodoApp._ICON_BY_CODE[task["priority"]]
+            parts.append(f"{status} [{task['id']}] {task['title']} {priority}")
             if task["description"]:
-                print(f"    Description: {task['description']}")
-        print("-" * 60)
+                parts.append(f"    Description: {task['description']}")
+            if len(parts) >= TodoApp._PRINT_CHUNK_LINES:
+                sys.stdout.write("\n".join(parts) + "\n")
+                parts.clear()
+        if self.is_empty(count):
+            return 0
+
+        parts.append("-" * 60)
+        sys.stdout.write("\n".join(parts) + "\n")
+        return count
 
     def choose_task(self, tasks: List[sqlite3.Row]) -> Optional[sqlite3.Row]:
         """Let the user pick a task by number from the provided list (1-based)."""
-        for i, task in enumerate(tasks, start=1):
-            print(f"{i}- [{task['id']}] {task['title']}")
+        lines = [f"{i}- [{task['id']}] {task['title']}" for i, task in enumerate(tasks, start=1)]
+        sys.stdout.write("\n".join(lines) + "\n")
         try:
             num_str = input("Enter the number: ").strip()
             num = int(num_str)
@@ -82,33 +175,63 @@ class TodoApp:
             print("❌ Invalid choice!")
             return None
 
+    def prompt_task_id(self, action: str) -> Optional[int]:
+        """List all tasks and ask for a task ID, e.g. action="delete" (None if empty or invalid)."""
+        if not self.print_tasks(self.get_all_tasks()):
+            return None
+        try:
+            return int(input(f"Enter task ID to {action}: "))
+        except ValueError:
+            print("❌ Please enter a valid number!")
+            return None
+
     # ---------------- Task Methods ----------------
     def add_task(self, title: str, description: str = "") -> None:
         """Add a new task to the database (title required)."""
         title = title.strip()
-        if not title:
-            raise ValueError("Task title cannot be empty")
-        self.cursor.execute("INSERT INTO tasks (title, description) VALUES (?, ?)", (title, description))
-        self.conn.commit()
+        self.add_tasks([(title, description)])
         print(f"✅ Task added: {title}")
 
-    def view_tasks(self) -> None:
-        tasks = self.get_all_tasks()
-        self.print_tasks(tasks)
+    def add_tasks(self, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Insert many (title, description) pairs atomically (one executemany, one transaction).
 
-    def complete_task(self, task_id: int) -> None:
-        """Mark a task as completed (1)."""
-        self.update_task_column(task_id, "completed", 1)
-        print(f"✅ Task {task_id} marked as completed!")
+        Returns the number of rows added.
+        """
+        rows = [(title.strip(), description) for title, description in pairs]
+        if any(not title for title, _ in rows):
+            raise ValueError("Task title cannot be empty")
+        # Without an explicit transaction, autocommit mode would commit every row separately
+        with self.transaction():
+            self.cursor.executemany("INSERT INTO tasks (title, description) VALUES (?, ?)", rows)
+        return len(rows)
 
-    def delete_task(self, task_id: int) -> None:
-        self.cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        self.conn.commit()
+    def view_tasks(self) -> None:
+        self.print_tasks(self.get_all_tasks())
+
+    def complete_task(self, task_id: int) -> bool:
+        """Mark a task as completed (1). Returns False if the task doesn't exist."""
+        # RETURNING tells us whether a row matched, so no separate existence probe is needed
+        self.cursor.execute("UPDATE tasks SET completed = 1 WHERE id = ? RETURNING id", (task_id,))
+        found = self.cursor.fetchone() is not None
+        if not found:
+            print(f"❌ Task {task_id} not found!")
+            return False
+        print(f"✅ Task {task_id} marked as completed!")
+        return True
+
+    def delete_task(self, task_id: int) -> bool:
+        """Delete a task. Returns False if the task doesn't exist."""
+        self.cursor.execute("DELETE FROM tasks WHERE id = ? RETURNING id", (task_id,))
+        found = self.cursor.fetchone() is not None
+        if not found:
+            print(f"❌ Task {task_id} not found!")
+            return False
         print(f"🗑️ Task {task_id} deleted!")
+        return True
 
     def set_priority(self) -> None:
         """Assign a priority (hard/medium/easy) to a selected task."""
-        tasks = self.get_all_tasks()
+        tasks = self.get_task_summaries()
         if self.is_empty(tasks):
             return
 
@@ -118,17 +241,18 @@ class TodoApp:
             return
 
         color = input("Difficulty (hard, medium, easy): ").strip().lower()
-        if color not in ("hard", "medium", "easy"):
+        if color not in TodoApp._CODE_BY_LABEL:
             print("❌ Invalid priority. Choose: hard, medium, or easy.")
             return
 
-        color_icon = {"hard": "🔴", "medium": "🟡", "easy": "🟢"}[color]
-        self.update_task_column(task["id"], "priority", color_icon)
+        code = TodoApp._CODE_BY_LABEL[color]
+        color_icon = TodoApp._ICON_BY_CODE[code]
+        self.update_task_column(task["id"], "priority", code)
         print(f"✅ Priority {color_icon} set for task {task['id']}.")
 
     def edit_task(self) -> None:
         """Edit title or description of a task."""
-        tasks = self.get_all_tasks()
+        tasks = self.get_task_summaries()
         if self.is_empty(tasks):
             return
 
@@ -151,17 +275,12 @@ class TodoApp:
 
     def gamble_task(self) -> None:
         """Randomly pick an incomplete task and offer to accept/reroll/cancel."""
-        tasks = self.get_all_tasks()
-        if self.is_empty(tasks):
-            return
-
-        incomplete = [t for t in tasks if t["completed"] == 0]
-        if not incomplete:
-            print("🎉 All tasks are completed! Nothing to gamble.")
-            return
-
         while True:
-            task = random.choice(incomplete)
+            task = self.get_random_incomplete_task()
+            if task is None:
+                if not self.is_empty(self.has_tasks()):
+                    print("🎉 All tasks are completed! Nothing to gamble.")
+                return
             print(f"\n🎲 You got: {task['title']}")
             choice = input("Accept this task? (yes / no / cancel): ").strip().lower()
 
@@ -179,14 +298,14 @@ class TodoApp:
     def search_tasks(self) -> None:
         """Filter tasks by priority (hard, medium, easy)."""
         difficulty = input("What is the difficulty (hard, medium, easy): ").strip().lower()
-        if difficulty not in ("hard", "medium", "easy"):
+        if difficulty not in TodoApp._CODE_BY_LABEL:
             print("❌ Invalid priority. Choose: hard, medium, or easy.")
             return
 
-        priority_map = {"hard": "🔴", "medium": "🟡", "easy": "🟢"}
-        target = priority_map[difficulty]
+        code = TodoApp._CODE_BY_LABEL[difficulty]
+        target = TodoApp._ICON_BY_CODE[code]
 
-        self.cursor.execute("SELECT * FROM tasks WHERE priority = ?", (target,))
+        self.cursor.execute("SELECT * FROM tasks WHERE priority = ?", (code,))
         results = self.cursor.fetchall()
         if not results:
             print(f"📋 No {difficulty} tasks found!")
@@ -204,14 +323,14 @@ class TodoApp:
 
     def statistics(self) -> None:
         """Display task counts and percentages."""
-        self.cursor.execute("SELECT COUNT(*) FROM tasks")
-        total = self.cursor.fetchone()[0]
-        if total == 0:
-            print("📋 No tasks yet!")
+        # Both aggregates read only the completed column, so this can be served from idx_tasks_completed
+        self.cursor.execute("SELECT COUNT(*) AS total, COALESCE(SUM(completed), 0) AS completed FROM tasks")
+        row = self.cursor.fetchone()
+        total = row["total"]
+        if self.is_empty(total):
             return
 
-        self.cursor.execute("SELECT COUNT(*) FROM tasks WHERE completed = 1")
-        completed = self.cursor.fetchone()[0]
+        completed = row["completed"]
         pending = total - completed
         completed_pct = (completed / total) * 100 if total else 0.0
         pending_pct = 100.0 - completed_pct
@@ -221,27 +340,22 @@ class TodoApp:
         print(f"Completed: {completed} ({completed_pct:.1f}%)")
         print(f"Pending: {pending} ({pending_pct:.1f}%)\n")
 
-        # By priority
-        self.cursor.execute("SELECT COUNT(*) FROM tasks WHERE priority IS NULL OR priority = ''")
-        no_priority = self.cursor.fetchone()[0]
-        if no_priority:
-            print(f"⚪ No Priority: {no_priority} tasks")
-
-        self.cursor.execute("SELECT COUNT(*) FROM tasks WHERE priority = '🔴'")
-        hard = self.cursor.fetchone()[0]
-        print(f"🔴 Hard: {hard} tasks")
-
-        self.cursor.execute("SELECT COUNT(*) FROM tasks WHERE priority = '🟡'")
-        medium = self.cursor.fetchone()[0]
-        print(f"🟡 Medium: {medium} tasks")
-
-        self.cursor.execute("SELECT COUNT(*) FROM tasks WHERE priority = '🟢'")
-        easy = self.cursor.fetchone()[0]
-        print(f"🟢 Easy: {easy} tasks")
+        # By priority: one row per priority code actually in use (0 = no priority)
+        self.cursor.execute("SELECT priority, COUNT(*) AS n FROM tasks GROUP BY priority")
+        counts = {r["priority"]: r["n"] for r in self.cursor.fetchall()}
+        if counts.get(0):
+            print(f"⚪ No Priority: {counts[0]} tasks")
+        for label, code in TodoApp._CODE_BY_LABEL.items():
+            print(f"{TodoApp._ICON_BY_CODE[code]} {label.title()}: {counts.get(code, 0)} tasks")
 
     def close(self) -> None:
         """Close the DB connection."""
         if self.conn:
+            # Recommended right before closing so future runs get fresh planner stats
+            try:
+                self.conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
             self.conn.close()
 
 
@@ -265,6 +379,8 @@ def main() -> None:
 
             choice = input("\nChoose option (1-10): ").strip()
 
+            # No transaction is held across input(): each action makes at most one write,
+            # which autocommits, so a stale read snapshot can't block it with "database is locked"
             if choice == "1":
                 title = input("Task title: ").strip()
                 if not title:
@@ -280,30 +396,14 @@ def main() -> None:
                 app.view_tasks()
 
             elif choice == "3":
-                app.view_tasks()
-                task_id = input("Enter task ID to complete: ").strip()
-                if not task_id.isdigit():
-                    print("❌ Please enter a valid number!")
-                    continue
-                task_id = int(task_id)
-                app.cursor.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,))
-                if not app.cursor.fetchone():
-                    print(f"❌ Task {task_id} not found!")
-                    continue
-                app.complete_task(task_id)
+                task_id = app.prompt_task_id("complete")
+                if task_id is not None:
+                    app.complete_task(task_id)
 
             elif choice == "4":
-                app.view_tasks()
-                task_id = input("Enter task ID to delete: ").strip()
-                if not task_id.isdigit():
-                    print("❌ Please enter a valid number!")
-                    continue
-                task_id = int(task_id)
-                app.cursor.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,))
-                if not app.cursor.fetchone():
-                    print(f"❌ Task {task_id} not found!")
-                    continue
-                app.delete_task(task_id)
+                task_id = app.prompt_task_id("delete")
+                if task_id is not None:
+                    app.delete_task(task_id)
 
             elif choice == "5":
                 app.set_priority()